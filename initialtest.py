@@ -1,6 +1,22 @@
 import pygame
 import math
 import random
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; without it the kernels run as plain NumPy
+    def njit(*args, **kwargs):
+        return lambda f: f
+
+# === MATH CONSTANTS ===
+# Bound once so the Kepler kernels skip np.* attribute lookups
+PI = np.pi
+TWO_PI = 2 * np.pi
+SIN = np.sin
+COS = np.cos
+SQRT = np.sqrt
+ABS = np.abs
 
 # === WINDOW SETTINGS ===
 WIDTH, HEIGHT = 1200, 1000
@@ -22,8 +38,19 @@ MOONS = [
     # Add more moons here easily
 ]
 
+# Per-field arrays so every body is propagated in one vectorized call
+PLANET_A = np.array([a for _, a, _, _, _, _ in PLANETS])
+PLANET_E = np.array([e for _, _, e, _, _, _ in PLANETS])
+PLANET_N = np.array([TWO_PI / T for _, _, _, T, _, _ in PLANETS])  # mean motion
+MOON_PARENT = np.array([p for _, p, _, _, _, _, _ in MOONS], dtype=np.intp)
+MOON_A = np.array([a for _, _, a, _, _, _, _ in MOONS])
+MOON_E = np.array([e for _, _, _, e, _, _, _ in MOONS])
+MOON_N = np.array([TWO_PI / T for _, _, _, _, T, _, _ in MOONS])
+
 omega_deg = 29.0  # argument of periapsis in degrees (same for all for simplicity)
 omega = math.radians(omega_deg)
+COS_OMEGA = math.cos(omega)
+SIN_OMEGA = math.sin(omega)
 
 # === TIME SETTINGS ===
 t = 0
@@ -47,64 +74,116 @@ SUN_GLOW = (255, 255, 180, 40)
 
 # === STAR BACKGROUND ===
 stars = [(random.randint(0, WIDTH), random.randint(0, HEIGHT), random.randint(1, 2)) for _ in range(200)]
+# Stars never move, so they are drawn once onto a background surface
+stars_bg = pygame.Surface((WIDTH, HEIGHT))
+stars_bg.fill((20, 20, 30))  # light black
+for x, y, r in stars:
+    pygame.draw.circle(stars_bg, WHITE, (x, y), r)
+stars_bg = stars_bg.convert()
+
+# === TEXT LABELS ===
+# Body names never change, so each label is rendered once
+PLANET_LABELS = [font.render(name, True, color).convert_alpha() for name, _, _, _, color, _ in PLANETS]
+MOON_LABELS = [font.render(name, True, color).convert_alpha() for name, _, _, _, _, color, _ in MOONS]
+
+# === ORBIT PATHS ===
+# Orbits are fixed ellipses, so their points (in AU) are computed once here
+def orbit_points(a, e):
+    theta = np.radians(np.arange(0, 360, 2))
+    r = a * (1 - e**2) / (1 + e * np.cos(theta))
+    x_orbit = r * np.cos(theta)
+    y_orbit = r * np.sin(theta)
+    x = x_orbit * COS_OMEGA - y_orbit * SIN_OMEGA
+    y = x_orbit * SIN_OMEGA + y_orbit * COS_OMEGA
+    return x, y
+
+ORBIT_PTS_AU = [orbit_points(a, e) for _, a, e, _, _, _ in PLANETS]
 
 cam_x, cam_y = 0.0, 0.0  # Camera offset in AU
 zoom = 1.0  # Camera zoom
 
-def solve_kepler(M, e, tol=1e-6, max_iter=100):
-    E = M if e < 0.8 else math.pi
-    for _ in range(max_iter):
-        delta = E - e * math.sin(E) - M
-        if abs(delta) < tol:
-            break
-        E -= delta / (1 - e * math.cos(E))
-    return E
-
-def get_position(a, e, T, t):
-    n = 2 * math.pi / T  # mean motion
+@njit(cache=True, fastmath=True)
+def solve_kepler(M, e):
+    # Markley (1995) non-iterative solver: cubic starter + one Danby correction
+    # Works elementwise on arrays of M and e
+    M = (M + PI) % TWO_PI - PI  # reduce M to [-pi, pi]
+    alpha = (3 * PI**2 + 1.6 * PI * (PI - ABS(M)) / (1 + e)) / (PI**2 - 6)
+    d = 3 * (1 - e) + alpha * e
+    q = 2 * alpha * d * (1 - e) - M * M
+    r = 3 * alpha * d * (d - 1 + e) * M + M**3
+    w = (ABS(r) + SQRT(q**3 + r * r)) ** (2 / 3)
+    E = (2 * r * w / (w * w + w * q + q * q) + M) / d
+    # Danby's quartic step; s and c double as the 2nd and 3rd derivatives
+    s = e * SIN(E)
+    c = e * COS(E)
+    f = E - s - M
+    fp = 1 - c
+    d1 = -f / fp
+    d2 = -f / (fp + 0.5 * d1 * s)
+    d3 = -f / (fp + 0.5 * d2 * s + d2 * d2 * c / 6)
+    return E + d3
+
+@njit(cache=True, fastmath=True)
+def _get_position(a, e, n, t, tau, cos_omega, sin_omega):
     M = n * (t - tau)  # mean anomaly
-    M = M % (2 * math.pi)  # keep M in [0, 2pi]
+    M = M % TWO_PI  # keep M in [0, 2pi]
     E = solve_kepler(M, e)
-    theta = 2 * math.atan2(math.sqrt(1 + e) * math.sin(E / 2),
-                           math.sqrt(1 - e) * math.cos(E / 2))
-    r = a * (1 - e * math.cos(E))
-    # Polar to Cartesian in orbit frame
-    x_orbit = r * math.cos(theta)
-    y_orbit = r * math.sin(theta)
+    # Orbit-frame position straight from E, so one sin/cos pair is enough
+    # (no true anomaly needed)
+    sin_E = SIN(E)
+    cos_E = COS(E)
+    x_orbit = a * (cos_E - e)
+    y_orbit = a * SQRT(1 - e * e) * sin_E
     # Rotate by omega (argument of periapsis)
-    x = x_orbit * math.cos(omega) - y_orbit * math.sin(omega)
-    y = x_orbit * math.sin(omega) + y_orbit * math.cos(omega)
+    x = x_orbit * cos_omega - y_orbit * sin_omega
+    y = x_orbit * sin_omega + y_orbit * cos_omega
     return x, y
 
+def get_position(a, e, n, t):
+    # a, e, n are arrays (one entry per body); returns arrays of x, y in AU
+    return _get_position(a, e, n, float(t), tau, COS_OMEGA, SIN_OMEGA)
+
+# Compile the kernels up front rather than on the first frame
+get_position(PLANET_A, PLANET_E, PLANET_N, 0.0)
+
 def to_screen(x_au, y_au):
-    x_px = CENTER[0] + int(((x_au - cam_x) * SCALE * zoom))
-    y_px = CENTER[1] - int(((y_au - cam_y) * SCALE * zoom))
-    return x_px, y_px
+    # Takes scalars or arrays; returns an (N, 2) int32 array of pixel coords
+    x_px = CENTER[0] + ((np.asarray(x_au) - cam_x) * SCALE * zoom).astype(np.int32)
+    y_px = CENTER[1] - ((np.asarray(y_au) - cam_y) * SCALE * zoom).astype(np.int32)
+    return np.column_stack((x_px, y_px))
 
-def draw_sun():
+def draw_sun(surface):
     # Draw the Sun at the solar system center, offset by camera
-    sun_x, sun_y = to_screen(0, 0)
-    pygame.draw.circle(screen, YELLOW, (sun_x, sun_y), int(24 * zoom))
-
-def draw_orbit(a, e, color):
-    points = []
-    for deg in range(0, 360, 2):
-        theta = math.radians(deg)
-        r = a * (1 - e**2) / (1 + e * math.cos(theta))
-        x_orbit = r * math.cos(theta)
-        y_orbit = r * math.sin(theta)
-        x = x_orbit * math.cos(omega) - y_orbit * math.sin(omega)
-        y = x_orbit * math.sin(omega) + y_orbit * math.cos(omega)
-        x_px, y_px = to_screen(x, y)
-        points.append((x_px, y_px))
-    pygame.draw.aalines(screen, color, True, points, 1)
-
-def draw_stars():
-    for x, y, r in stars:
-        pygame.draw.circle(screen, WHITE, (x, y), r)
+    (sun_x, sun_y), = to_screen(0, 0).tolist()
+    pygame.draw.circle(surface, YELLOW, (sun_x, sun_y), int(24 * zoom))
+
+def draw_orbit(surface, i, color):
+    # Only the camera transform is applied per frame; the ellipse is cached in AU
+    pygame.draw.aalines(surface, color, True, to_screen(*ORBIT_PTS_AU[i]).tolist(), 1)
 
 # === TRAILS ===
-trails = [[] for _ in PLANETS]
+# One ring buffer of positions (in AU) per planet; trail_heads counts writes.
+# Points are projected when drawn, so trails follow the camera like the orbits.
+# float32 keeps all trails in one small contiguous block.
+TRAIL_LEN = 800
+trails = np.zeros((len(PLANETS), TRAIL_LEN, 2), dtype=np.float32)
+trail_heads = np.zeros(len(PLANETS), dtype=np.int32)
+TRAIL_PIXELS = [screen.map_rgb(color) for _, _, _, _, color, _ in PLANETS]
+
+hud_key = None  # (dt, zoom) the HUD text was last rendered for
+
+# === DIRTY RECTS ===
+# Stars, Sun and orbits only move with the camera, so they live on a static
+# background; each frame only the rects touched by moving parts are redrawn
+background = pygame.Surface((WIDTH, HEIGHT)).convert()
+view_key = None  # (cam_x, cam_y, zoom) the background was last built for
+dirty_rects = []
+
+def build_background():
+    background.blit(stars_bg, (0, 0))
+    draw_sun(background)
+    for i, (_, _, _, _, color, _) in enumerate(PLANETS):
+        draw_orbit(background, i, color)
 
 while running:
     for event in pygame.event.get():
@@ -130,46 +209,69 @@ while running:
 
     t += dt
 
-    # Draw background
-    screen.fill((20, 20, 30))  # light black
-   
-    draw_sun()
-    # Show speed and zoom
-    speed_text = font.render(f"Speed: {dt:.2f} days/frame", True, (200, 200, 200))
-    zoom_text = font.render(f"Zoom: {zoom:.2f}x", True, (200, 200, 200))
-    screen.blit(speed_text, (20, 20))
-    screen.blit(zoom_text, (20, 50))
-
-    # Draw orbits and planets
-    planet_positions = []
-    for i, (name, a, e, T, color, radius) in enumerate(PLANETS):
-        draw_orbit(a, e, color)
-        x_au, y_au = get_position(a, e, T, t)
-        x_px, y_px = to_screen(x_au, y_au)
-        planet_positions.append((x_au, y_au, x_px, y_px, color, radius, name))
-        trails[i].append((x_px, y_px))
-        if len(trails[i]) > 800:
-            trails[i].pop(0)
-        
-        # Draw planet
-        pygame.draw.circle(screen, color, (x_px, y_px), max(2, int(radius * zoom)))
-        text = font.render(name, True, color)
-        screen.blit(text, (x_px + 12, y_px - 12))
+    # Draw background: rebuild it if the camera moved, otherwise just erase
+    # the bodies and labels drawn over it last frame
+    if view_key != (cam_x, cam_y, zoom):
+        build_background()
+        view_key = (cam_x, cam_y, zoom)
+        screen.blit(background, (0, 0))
+        erased = [screen.get_rect()]
+    else:
+        for rect in dirty_rects:
+            screen.blit(background, rect, rect)
+        erased = dirty_rects
+    dirty_rects = []
+
+    # Show speed and zoom, re-rendering the text only when either changes
+    if hud_key != (dt, zoom):
+        speed_text = font.render(f"Speed: {dt:.2f} days/frame", True, (200, 200, 200)).convert_alpha()
+        zoom_text = font.render(f"Zoom: {zoom:.2f}x", True, (200, 200, 200)).convert_alpha()
+        hud_key = (dt, zoom)
+    dirty_rects.append(screen.blit(speed_text, (20, 20)))
+    dirty_rects.append(screen.blit(zoom_text, (20, 50)))
+
+    # Propagate all planets and moons at once
+    x_au, y_au = get_position(PLANET_A, PLANET_E, PLANET_N, t)
+    m_x_rel, m_y_rel = get_position(MOON_A, MOON_E, MOON_N, t)
+    # Moon positions are relative to their parent planet
+    m_x_au = x_au[MOON_PARENT] + m_x_rel
+    m_y_au = y_au[MOON_PARENT] + m_y_rel
+    planet_px = to_screen(x_au, y_au)
+    moon_px = to_screen(m_x_au, m_y_au)
+
+    # Record this frame's positions. A full trail evicts its oldest point, so
+    # that pixel is erased too; the newest point sits under its planet, whose
+    # rect is already dirty.
+    slots = np.arange(len(PLANETS)), trail_heads % TRAIL_LEN
+    for i, (x, y) in enumerate(to_screen(*trails[slots].T).tolist()):
+        if trail_heads[i] >= TRAIL_LEN and 0 <= x < WIDTH and 0 <= y < HEIGHT:
+            erased.append(screen.blit(background, (x, y), (x, y, 1, 1)))
+    trails[slots] = np.column_stack((x_au, y_au))
+    trail_heads += 1
+
+    # Draw trails as single-pixel dots written straight into the framebuffer.
+    # All dots are redrawn so any that were erased with a body come back; only
+    # the erased pixels need to reach the display.
+    buf = pygame.surfarray.pixels2d(screen)
+    for i in range(len(PLANETS)):
+        xs, ys = to_screen(*trails[i, :min(trail_heads[i], TRAIL_LEN)].T).T
+        on_screen = (xs >= 0) & (xs < WIDTH) & (ys >= 0) & (ys < HEIGHT)
+        buf[xs[on_screen], ys[on_screen]] = TRAIL_PIXELS[i]
+    del buf  # unlock the screen before blitting to it
+
+    # Draw planets
+    for i, (x, y) in enumerate(planet_px.tolist()):
+        _, _, _, _, color, radius = PLANETS[i]
+        dirty_rects.append(pygame.draw.circle(screen, color, (x, y), max(2, int(radius * zoom))))
+        dirty_rects.append(screen.blit(PLANET_LABELS[i], (x + 12, y - 12)))
 
     # Draw moons
-    for moon in MOONS:
-        m_name, parent_idx, m_a, m_e, m_T, m_color, m_radius = moon
-        parent_x_au, parent_y_au, _, _, _, _, _ = planet_positions[parent_idx]
-        # Moon's position relative to its planet
-        m_x_rel, m_y_rel = get_position(m_a, m_e, m_T, t)
-        m_x_au = parent_x_au + m_x_rel
-        m_y_au = parent_y_au + m_y_rel
-        m_x_px, m_y_px = to_screen(m_x_au, m_y_au)
-        pygame.draw.circle(screen, m_color, (m_x_px, m_y_px), max(2, int(m_radius * zoom)))
-        m_text = font.render(m_name, True, m_color)
-        screen.blit(m_text, (m_x_px + 10, m_y_px - 10))
-
-    pygame.display.flip()
+    for j, (x, y) in enumerate(moon_px.tolist()):
+        _, _, _, _, _, m_color, m_radius = MOONS[j]
+        dirty_rects.append(pygame.draw.circle(screen, m_color, (x, y), max(2, int(m_radius * zoom))))
+        dirty_rects.append(screen.blit(MOON_LABELS[j], (x + 10, y - 10)))
+
+    pygame.display.update(erased + dirty_rects)
     clock.tick(60)
 
 pygame.quit()